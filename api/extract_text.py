@@ -1,46 +1,124 @@
-from pypdf import PdfReader
+from bisect import bisect_right
+from collections import Counter
+import pypdfium2 as pdfium
+import heapq
+import numpy as np
 import re
-import textstat
+
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?]) +')
+JARGON_TERMS = ("shall", "liable", "indemnify", "waive", "penalty",
+                "terminate", "nonrefundable", "dosage", "administer",
+                "contraindicated", "adverse", "required")
+_IF_UNLESS_RE = re.compile(r'\b(?:if|unless)\b', re.I)
+_WORD_RE = re.compile(r'\w+')
+_WORD_CHAR_RE = re.compile(r'\w')
+_NON_WORD_RE = re.compile(r'\W+')
+_FRAGMENT_RE = re.compile(r'[^.!?]+')
+_VOWEL_GROUP_RE = re.compile(r'[aeiouy]+', re.I)
 
 def extract_text_from_pdf(path: str) -> str:
-    reader = PdfReader(path)
+    pdf = pdfium.PdfDocument(path)
     text_parts = []
-    for page in reader.pages:
-        page_text = page.extract_text() or ""
-        text_parts.append(page_text)
+    for i in range(len(pdf)):
+        page = pdf[i]
+        textpage = page.get_textpage()
+        text_parts.append(textpage.get_text_range())
+        textpage.close()
+        page.close()
+    pdf.close()
     text = "\n".join(t.strip() for t in text_parts if t.strip())
     return text
 
-def assert_text_pdf(text: str, min_chars: int = 500):
-    if len(text) < min_chars:
+def _alpha_ratio(text: str) -> float:
+    # Share of ASCII letters among the UTF-8 bytes, vectorized over a
+    # zero-copy uint8 view
+    b = np.frombuffer(text.encode("utf-8", "ignore"), dtype=np.uint8)
+    if not b.size:
+        return 0.0
+    return float((((b >= 65) & (b <= 90)) | ((b >= 97) & (b <= 122))).mean())
+
+def assert_text_pdf(text: str, min_chars: int = 500, min_alpha_ratio: float = 0.5,
+                    min_words: int = 100):
+    # Scanned PDFs often extract to a few hundred chars of glyph garbage;
+    # reject those before they reach readability/scoring.
+    if (len(text) < min_chars
+            or _alpha_ratio(text) <= min_alpha_ratio
+            or len(_WORD_RE.findall(text)) <= min_words):
         raise ValueError("OCR not supported in demo version. Please upload a text-based PDF.")
 
+def _is_counted_sentence(fragment: str) -> bool:
+    # textstat only counts runs between [.!?] with more than two words
+    return sum(1 for t in fragment.split() if _WORD_CHAR_RE.search(t)) > 2
+
 def compute_readability(text: str):
-    grade = textstat.flesch_kincaid_grade(text)
-    reading_time = textstat.reading_time(text)
+    # Flesch-Kincaid grade + reading time (seconds, 14.69 ms per non-space
+    # char) from one word/sentence/syllable count. Words are whitespace
+    # tokens with a letter or digit, as in textstat's lexicon_count.
+    # Syllables are vowel groups less a silent trailing "e", counted once
+    # per distinct word.
+    n_words = n_syllables = 0
+    for t, n in Counter(text.lower().split()).items():
+        if _WORD_CHAR_RE.search(t):
+            w = _NON_WORD_RE.sub("", t)
+            syllables = len(_VOWEL_GROUP_RE.findall(w)) - (1 if w.endswith("e") else 0)
+            n_words += n
+            n_syllables += n * max(1, syllables)
+    if not n_words:
+        return 0.0, 0.0
+    n_sentences = max(1, sum(map(_is_counted_sentence, _FRAGMENT_RE.findall(text))))
+    grade = 0.39 * (n_words / n_sentences) + 11.8 * (n_syllables / n_words) - 15.59
+    reading_time = sum(map(len, text.split())) * 14.69 / 1000
     return grade, reading_time
 
 def split_sentences(text: str):
-    return re.split(r'(?<=[.!?]) +', text)
+    # Returns (sentences, start offset of each sentence in text)
+    sentences, starts = [], []
+    last = 0
+    for m in _SENT_SPLIT_RE.finditer(text):
+        sentences.append(text[last:m.start()])
+        starts.append(last)
+        last = m.end()
+    sentences.append(text[last:])
+    starts.append(last)
+    return sentences, starts
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
 
-def risk_score(sentence: str):
+def count_jargon_hits(text: str, starts):
+    # Whole-word JARGON_TERMS hits per sentence. The text is lowered once
+    # and each term is located with str.find over the whole document;
+    # bisect over sentence start offsets maps each hit to its sentence.
+    text_lower = text.lower()
+    if len(text_lower) != len(text):
+        # Lowercasing changed the length (e.g. "İ"); keep offsets aligned
+        text_lower = "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+    hits = [0] * len(starts)
+    n = len(text_lower)
+    for term in JARGON_TERMS:
+        i = text_lower.find(term)
+        while i != -1:
+            end = i + len(term)
+            if (i == 0 or not _is_word_char(text_lower[i - 1])) and \
+                    (end == n or not _is_word_char(text_lower[end])):
+                hits[bisect_right(starts, i) - 1] += 1
+            i = text_lower.find(term, end)
+    return hits
+
+def risk_score(sentence: str, jargon_hits: int = 0):
     score = 0
     
     # Long sentence penalty
     if len(sentence.split()) > 25:
         score += 2
 
-    # Legal/medical jargon detection
-    jargon_terms = ["shall", "liable", "indemnify", "waive", "penalty",
-                    "terminate", "nonrefundable", "dosage", "administer",
-                    "contraindicated", "adverse", "required"]
-
-    for term in jargon_terms:
-        if term in sentence.lower():
-            score += 1
+    # Legal/medical jargon detection (counted document-wide by
+    # count_jargon_hits)
+    score += jargon_hits
 
     # Conditional complexity
-    if "if" in sentence.lower() or "unless" in sentence.lower():
+    if _IF_UNLESS_RE.search(sentence) is not None:
         score += 1
 
     return score
@@ -54,15 +132,16 @@ if __name__ == "__main__":
 
     grade, reading_time = compute_readability(text)
 
-    sentences = split_sentences(text)
-    scored = [(s, risk_score(s)) for s in sentences]
-    scored.sort(key=lambda x: x[1], reverse=True)
+    sentences, starts = split_sentences(text)
+    hits = count_jargon_hits(text, starts)
+    scored = [(s, risk_score(s, h)) for s, h in zip(sentences, hits)]
+    top_scored = heapq.nlargest(5, scored, key=lambda x: x[1])
 
     print("\nReadability Grade Level:", round(grade, 2))
     print("Estimated Reading Time (minutes):", round(reading_time / 60, 2))
 
     print("\nTop 5 High-Risk Sentences:\n")
-    for s, score in scored[:5]:
+    for s, score in top_scored:
         print("Risk Score:", score)
         print(s.strip())
         print("-----")
\ No newline at end of file
@@ -1,15 +1,39 @@
+import asyncio
+import hashlib
+import multiprocessing
 import os
 import re
-from typing import List
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import (
+    CancelledError,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    TimeoutError as FuturesTimeoutError,
+)
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Deque, Iterator, List, Optional, Tuple
 
-from fastapi import FastAPI, UploadFile, File
+import ahocorasick
+import numpy as np
+from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from pypdf import PdfReader
-import textstat
+import pypdfium2 as pdfium
 
 from groq import Groq
 
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 
 app = FastAPI(title="ReadRight API", version="1.0.0")
 
@@ -68,6 +92,74 @@ class RewriteResponse(BaseModel):
 # ---------------------------
 # Helpers
 # ---------------------------
+# Compiled once at import; these run for every sentence of every upload.
+_WORD_GAP_RE = re.compile(r"(\w)\s+(\w)")
+_HYPHEN_RE = re.compile(r" ?- ?")
+_WS_RE = re.compile(r"\s+")
+_DIGIT_RE = re.compile(r"\d")
+_WORD_CHAR_RE = re.compile(r"\w")
+_NON_WORD_RE = re.compile(r"\W+")
+_FRAGMENT_RE = re.compile(r"[^.!?]+")
+_SENT_END_RE = re.compile(r"[.!?]\s+")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+", re.I)
+
+# Misextracted PDFs (scans, tables of glyphs) can yield huge "words" or
+# runs with no sentence end. Tokens are clamped and overlong sentences are
+# scored in capped pieces so one bad page can't blow up per-sentence work.
+_MAX_TOKEN_CHARS = 256
+_LONG_TOKEN_RE = re.compile(r"\S{%d,}" % (_MAX_TOKEN_CHARS + 1))
+_MAX_SENTENCE_CHARS = 2000
+
+_MS_PER_CHAR = 14.69
+
+# Legal / complex language indicators. One Aho-Corasick automaton finds
+# every occurrence across a whole chunk in a single pass (see
+# count_jargon_hits); values are term lengths so hits map back to offsets.
+COMPLEX_TERMS = (
+    "shall",
+    "hereby",
+    "pursuant",
+    "liable",
+    "terminate",
+    "whereas",
+    "thereof",
+    "notwithstanding",
+    "civil code",
+    "hud",
+    "calhfa",
+)
+
+_JARGON_AC = ahocorasick.Automaton()
+for _term in COMPLEX_TERMS:
+    _JARGON_AC.add_word(_term, len(_term))
+_JARGON_AC.make_automaton()
+
+# Hyperscan, where a wheel exists for the platform (x86-64), compiles the
+# terms into one SIMD-accelerated DFA and is used in place of the automaton
+# for ASCII text. It reports byte offsets, so non-ASCII chunks still go
+# through Aho-Corasick. Scratch space is per-thread, as Hyperscan requires.
+def _compile_jargon_hyperscan():
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=[rb"\b" + term.encode("ascii") + rb"\b" for term in COMPLEX_TERMS],
+        ids=list(range(len(COMPLEX_TERMS))),
+        elements=len(COMPLEX_TERMS),
+        flags=[hyperscan.HS_FLAG_CASELESS] * len(COMPLEX_TERMS),
+    )
+    return db
+
+
+_JARGON_HS = None
+if hyperscan is not None:
+    try:
+        _JARGON_HS = _compile_jargon_hyperscan()
+    except Exception:
+        # hyperscan.error on a CPU the library doesn't support, or whatever
+        # a broken native build raises; Aho-Corasick covers everything.
+        _JARGON_HS = None
+_hs_local = threading.local()
+
+
 def normalize_text(text: str) -> str:
     """
     PDF extraction often includes weird newlines/spaces.
@@ -79,89 +171,448 @@ def normalize_text(text: str) -> str:
     # Replace newlines/tabs with spaces
     text = text.replace("\n", " ").replace("\t", " ")
 
+    # Collapse multiple spaces first, so the patterns below see at most one
+    # space at a time (an unbounded \s*-\s* is quadratic on long blank runs)
+    text = _WS_RE.sub(" ", text)
+
     # Fix common PDF hyphenation splits: "initi al" or "re- rented"
     # (This is conservative: only collapses when it looks like a split word.)
-    text = re.sub(r"(\w)\s+(\w)", r"\1 \2", text)  # keep single spaces between words
-    text = re.sub(r"\s*-\s*", "-", text)          # normalize spaced hyphens -> hyphen
+    text = _WORD_GAP_RE.sub(r"\1 \2", text)  # keep single spaces between words
+    text = _HYPHEN_RE.sub("-", text)          # normalize spaced hyphens -> hyphen
+
+    text = text.strip()
 
-    # Collapse multiple spaces
-    text = re.sub(r"\s+", " ", text).strip()
+    # Truncate runaway tokens
+    text = _LONG_TOKEN_RE.sub(lambda m: m.group(0)[:_MAX_TOKEN_CHARS], text)
 
     return text
 
 
-def split_sentences(text: str) -> List[str]:
+# Word frequencies are Zipfian, so most tokens are repeats; syllable counts
+# are memoized per lowercased word across requests.
+@lru_cache(maxsize=65536)
+def count_syllables(word: str) -> int:
     """
-    Basic sentence splitter.
+    Vowel groups in a lowercased word, less a silent trailing "e"
+    (minimum 1).
     """
-    if not text:
-        return []
-    # Split on ., !, ? followed by whitespace
-    parts = re.split(r"(?<=[.!?])\s+", text)
-    return [p.strip() for p in parts if p and p.strip()]
+    n = len(_VOWEL_GROUP_RE.findall(word))
+    if word.endswith("e"):
+        n -= 1
+    return max(1, n)
+
+
+def _is_counted_sentence(fragment: str) -> bool:
+    """textstat only counts runs between [.!?] with more than two words."""
+    n = 0
+    for token in fragment.split():
+        if _WORD_CHAR_RE.search(token):
+            n += 1
+            if n > 2:
+                return True
+    return False
+
+
+def readability_counts(text: str) -> Tuple[int, int, int, int]:
+    """
+    (words, sentences, syllables, non-space chars) of a span of normalized
+    text (single spaces). All four are additive over spans that start and
+    end at sentence boundaries, so a document can be counted chunk by chunk.
+    Words are whitespace-separated tokens with a letter or digit, as in
+    textstat's lexicon_count, so "don't" and "$1,200.00" are one word each.
+    Syllables are counted once per distinct word, then weighted by
+    frequency.
+    """
+    n_words = n_syllables = 0
+    for token, n in Counter(text.lower().split()).items():
+        if _WORD_CHAR_RE.search(token):
+            n_words += n
+            n_syllables += n * count_syllables(_NON_WORD_RE.sub("", token))
+    n_sentences = sum(map(_is_counted_sentence, _FRAGMENT_RE.findall(text)))
+    return n_words, n_sentences, n_syllables, len(text) - text.count(" ")
+
+
+def fused_readability(
+    n_words: int, n_sentences: int, n_syllables: int, n_chars: int
+) -> Tuple[float, float]:
+    """
+    Flesch-Kincaid grade and reading time (minutes) from one tokenization:
+    the readability_counts totals of a document are shared by both.
+    """
+    if not n_words:
+        return 0.0, 0.0
+
+    n_sentences = max(1, n_sentences)
+    grade = 0.39 * (n_words / n_sentences) + 11.8 * (n_syllables / n_words) - 15.59
+    # Demberg & Keller reading time: 14.69 ms per non-space character
+    minutes = n_chars * _MS_PER_CHAR / 1000 / 60
+    return grade, minutes
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+def _count_jargon_hits_hyperscan(text: str, starts: List[int]) -> List[int]:
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_JARGON_HS)
+
+    hits = [0] * len(starts)
+
+    def on_match(term_id, _from, to, _flags, _context):
+        hits[bisect_right(starts, to - len(COMPLEX_TERMS[term_id])) - 1] += 1
+
+    _JARGON_HS.scan(text.encode("ascii"), match_event_handler=on_match, scratch=scratch)
+    return hits
+
+
+def count_jargon_hits(text: str, starts: List[int]) -> List[int]:
+    """
+    Count whole-word COMPLEX_TERMS occurrences in `text`, bucketed by
+    sentence. `starts` holds the sorted start offset of each sentence;
+    hits[i] is the number of terms found in sentence i.
+    """
+    if _JARGON_HS is not None and text.isascii():
+        return _count_jargon_hits_hyperscan(text, starts)
+
+    text_lower = text.lower()
+    if len(text_lower) != len(text):
+        # Rare: lowercasing changed the length (e.g. "İ"), which would shift
+        # offsets. Only lowercase characters that map one-to-one.
+        text_lower = "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+    hits = [0] * len(starts)
+    n = len(text_lower)
+    for end, length in _JARGON_AC.iter(text_lower):
+        start = end - length + 1
+        # Whole words only, like \bterm\b
+        if start > 0 and _is_word_char(text_lower[start - 1]):
+            continue
+        if end + 1 < n and _is_word_char(text_lower[end + 1]):
+            continue
+        hits[bisect_right(starts, start) - 1] += 1
+    return hits
 
 
 def score_sentence(sentence: str) -> int:
+    """
+    Per-sentence penalties. Jargon is counted chunk-wide by
+    count_jargon_hits and added on top in _score_into.
+    """
     score = 0
 
-    words = sentence.split()
-
-    # Length penalty
-    if len(words) > 25:
+    # Length penalty: more than 25 words. Sentences are normalized to single
+    # spaces, so counting separators avoids building a word list.
+    if sentence.count(" ") >= 25:
         score += 2
 
-    # Legal / complex language indicators
-    complex_terms = [
-        "shall",
-        "hereby",
-        "pursuant",
-        "liable",
-        "terminate",
-        "whereas",
-        "thereof",
-        "notwithstanding",
-        "civil code",
-        "hud",
-        "calhfa",
-    ]
-
-    s_lower = sentence.lower()
-    for term in complex_terms:
-        if term in s_lower:
-            score += 2
-
     # Numbers increase cognitive load
-    if re.search(r"\d", sentence):
+    if _DIGIT_RE.search(sentence):
         score += 1
 
     return score
 
 
+def _score_into(sentences: List[str], scores: array, sentence: str, jargon_hits: int) -> None:
+    clean = sentence.strip()
+    if len(clean) < 20:
+        return
+    risk = score_sentence(clean) + 2 * jargon_hits
+    if risk > 0:
+        sentences.append(clean)
+        # Scores stay well under 255 in practice; clamp so pathological
+        # text can't overflow the uint8 slot.
+        scores.append(min(risk, 255))
+
+
+def _capped_spans(text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """
+    Split text[start:end] into spans of at most _MAX_SENTENCE_CHARS, cutting
+    at the last space before the cap (or hard at the cap if there is none).
+    """
+    while end - start > _MAX_SENTENCE_CHARS:
+        cut = text.rfind(" ", start + 1, start + _MAX_SENTENCE_CHARS + 1)
+        if cut == -1:
+            cut = start + _MAX_SENTENCE_CHARS
+            yield start, cut
+            start = cut
+        else:
+            yield start, cut
+            start = cut + 1
+    yield start, end
+
+
+def score_complete_sentences(
+    text: str, sentences: List[str], scores: array, final: bool = False
+) -> int:
+    """
+    Score each complete sentence of normalized `text` (ending in ., !, ?
+    followed by whitespace), appending flagged sentences and their scores
+    to the parallel `sentences` / `scores` arrays. Returns the offset where
+    the trailing, possibly incomplete, fragment starts; callers carry
+    text[offset:] into the next chunk. With `final`, the fragment is scored
+    too and len(text) is returned. Sentences over _MAX_SENTENCE_CHARS are
+    scored as several capped pieces.
+    """
+    starts: List[int] = []
+    ends: List[int] = []
+    last = 0
+    for m in _SENT_END_RE.finditer(text):
+        for start, end in _capped_spans(text, last, m.start() + 1):
+            starts.append(start)
+            ends.append(end)
+        last = m.end()
+    if final and last < len(text):
+        for start, end in _capped_spans(text, last, len(text)):
+            starts.append(start)
+            ends.append(end)
+        last = len(text)
+    if not starts:
+        return last
+
+    hits = count_jargon_hits(text[:last], starts)
+    for start, end, n_hits in zip(starts, ends, hits):
+        _score_into(sentences, scores, text[start:end], n_hits)
+    return last
+
+
 # ---------------------------
-# Routes
+# PDF extraction
 # ---------------------------
-@app.get("/api")
-def root():
-    return {"status": "ReadRight backend running"}
+# Strategy tiers by page count, checked in order. Process startup/dispatch
+# costs tens of ms and PDFium extracts a page in a few ms, so PDFs up to a
+# couple hundred pages stay serial; larger ones fan page ranges out to worker
+# processes. There's no thread tier: PDFium isn't thread-safe, so in-process
+# calls are serialized anyway. "max_pages": None means "no upper bound".
+_EXTRACTION_TIERS = {
+    "small": {"max_pages": 200, "executor": "serial", "chunk_size": None},
+    "large": {"max_pages": 1000, "executor": "process", "chunk_size": 200},
+    "huge": {"max_pages": None, "executor": "process", "chunk_size": 500},
+}
+
+# Bound on extracted page ranges waiting to be scored; enough to keep every
+# worker busy without queueing the whole document.
+_MAX_PENDING_CHUNKS = 2 * (os.cpu_count() or 1)
+
+# A page range that takes longer than this is treated like a crashed worker.
+# A failed range is retried once on a fresh pool, then the request fails:
+# it's never re-run in this process, where a PDFium crash would take the
+# server down and a hang would hold _pdfium_lock for everyone.
+_CHUNK_TIMEOUT_SECONDS = 120
+
+# Created at startup. If the runtime can't start worker processes (no
+# /dev/shm on some serverless hosts) the process pool stays None and every
+# PDF is extracted inline. _analyze_pool runs whole requests off the event loop.
+_analyze_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+# PDFium must not be called from two threads at once, even on different
+# documents. Every in-process call holds this lock; worker processes run one
+# job at a time and have PDFium to themselves.
+_pdfium_lock = threading.Lock()
+
+
+def _page_text(pdf: pdfium.PdfDocument, index: int) -> str:
+    """Text of one page; caller holds _pdfium_lock."""
+    page = pdf[index]
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range()
+    finally:
+        textpage.close()
+        page.close()
 
 
-@app.get("/api/health")
-def health():
-    return {"status": "ok"}
+def _extract_range(path: str, start: int, end: int) -> str:
+    """
+    Extract text from pages [start, end) of the PDF at `path`.
+    Opens its own PdfDocument so it can run in a worker process
+    (PDFium handles can't be pickled). In-process callers must hold
+    _pdfium_lock.
+    """
+    pdf = pdfium.PdfDocument(path)
+    try:
+        parts = [_page_text(pdf, i) for i in range(start, end)]
+    finally:
+        pdf.close()
+    return "\n".join(p for p in parts if p)
 
 
-@app.post("/api/analyze", response_model=AnalyzeResponse)
-async def analyze_pdf(file: UploadFile = File(...)):
-    reader = PdfReader(file.file)
+class PdfExtractionError(Exception):
+    """A page range crashed or hung its worker twice; the PDF can't be read."""
+
+
+def _replace_process_pool(failed: ProcessPoolExecutor, timed_out: bool) -> ProcessPoolExecutor:
+    """
+    Swap out a crashed or stuck process pool (unless another request already
+    has) and return the current one. Raises PdfExtractionError if no
+    replacement could be started.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is failed:
+            try:
+                _process_pool = _new_process_pool()
+            except (OSError, NotImplementedError):
+                _process_pool = None
+        pool = _process_pool
+
+    if timed_out:
+        # shutdown() doesn't stop a worker stuck in PDFium, so kill them.
+        # ProcessPoolExecutor only gained terminate_workers() in 3.14.
+        terminate = getattr(failed, "terminate_workers", None)
+        if terminate is not None:
+            terminate()
+        else:
+            for proc in list((failed._processes or {}).values()):
+                proc.kill()
+    failed.shutdown(wait=False, cancel_futures=True)
+
+    if pool is None:
+        raise PdfExtractionError("PDF extraction workers could not be restarted.")
+    return pool
+
+
+def _select_strategy(n_pages: int) -> Tuple[Optional[Executor], int]:
+    """
+    Pick (executor, chunk_size) for a PDF with `n_pages` pages.
+    An executor of None means extract serially, page by page.
+    """
+    for tier in _EXTRACTION_TIERS.values():
+        if tier["max_pages"] is None or n_pages <= tier["max_pages"]:
+            break
 
-    raw_text = ""
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            raw_text += page_text + "\n"
+    if tier["executor"] == "process" and _process_pool is not None:
+        return _process_pool, tier["chunk_size"]
+    return None, n_pages
 
-    raw_text = raw_text.strip()
-    if not raw_text:
+
+def _iter_pdf_chunks(path: str) -> Iterator[str]:
+    """
+    Yield extracted text in page order, one page (serial) or one page range
+    (pooled) at a time. At most _MAX_PENDING_CHUNKS ranges are in flight, so
+    a slow consumer never has the whole document buffered.
+    """
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(path)
+        n_pages = len(pdf)
+
+    # Serial PDFs are read through this handle. Pooled ones only needed the
+    # page count, so the finally closes it before any range is dispatched.
+    executor, chunk_size = _select_strategy(n_pages)
+    try:
+        if executor is None:
+            for i in range(n_pages):
+                # Lock per page, not across the yield, so other requests'
+                # extraction interleaves with this one's scoring.
+                with _pdfium_lock:
+                    page_text = _page_text(pdf, i)
+                yield page_text
+            return
+    finally:
+        with _pdfium_lock:
+            pdf.close()
+
+    # Each entry is (start, end, pool, future, retried); pool is the executor
+    # the future was submitted to, so a failure replaces the right pool.
+    pending: Deque[Tuple[int, int, ProcessPoolExecutor, Future, bool]] = deque()
+
+    def submit(start: int, end: int, retried: bool) -> None:
+        nonlocal executor
+        try:
+            future = executor.submit(_extract_range, path, start, end)
+        except RuntimeError:
+            # Broken, or shut down by a request that hit a broken pool.
+            executor = _replace_process_pool(executor, timed_out=False)
+            try:
+                future = executor.submit(_extract_range, path, start, end)
+            except RuntimeError as exc:
+                raise PdfExtractionError("PDF extraction workers keep failing.") from exc
+        pending.append((start, end, executor, future, retried))
+
+    def next_chunk() -> str:
+        nonlocal executor
+        while True:
+            start, end, pool, future, retried = pending.popleft()
+            try:
+                return future.result(timeout=_CHUNK_TIMEOUT_SECONDS)
+            except (BrokenProcessPool, CancelledError, FuturesTimeoutError) as exc:
+                timed_out = isinstance(exc, FuturesTimeoutError)
+                if retried:
+                    _replace_process_pool(pool, timed_out)
+                    raise PdfExtractionError(
+                        f"Pages {start + 1}-{end} crashed or hung the PDF reader."
+                    ) from exc
+                executor = _replace_process_pool(pool, timed_out)
+            # Retry once, ahead of the ranges still queued.
+            submit(start, end, retried=True)
+            pending.rotate(1)
+
+    try:
+        for start in range(0, n_pages, chunk_size):
+            if len(pending) >= _MAX_PENDING_CHUNKS:
+                yield next_chunk()
+            submit(start, min(start + chunk_size, n_pages), retried=False)
+        while pending:
+            yield next_chunk()
+    finally:
+        for entry in pending:
+            entry[3].cancel()
+
+
+def _analyze_sync(data: bytes) -> dict:
+    """
+    The whole /api/analyze pipeline for one uploaded PDF. Synchronous and
+    CPU-bound, so the route runs it on _analyze_pool, off the event loop.
+    """
+    # Spill to disk so each extraction worker can re-open the PDF by path.
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(data)
+        pdf_path = tmp.name
+
+    # Score sentences as chunks arrive instead of joining the whole document
+    # first. `tail` is the last, possibly incomplete, sentence; it's
+    # re-normalized with the next chunk so splits across pages heal.
+    # Flagged sentences and their risk scores are kept as parallel arrays;
+    # scores pack into uint8 so ranking runs in NumPy without per-entry dicts.
+    # Readability only needs running totals, so scored text is dropped as
+    # soon as it has been counted.
+    sentences: List[str] = []
+    scores = array("B")
+    totals = [0, 0, 0, 0]
+    has_text = False
+    tail = ""
+
+    def count(span: str) -> None:
+        nonlocal totals, has_text
+        totals = [a + b for a, b in zip(totals, readability_counts(span))]
+        has_text = has_text or bool(span.strip())
+
+    try:
+        for chunk in _iter_pdf_chunks(pdf_path):
+            if not chunk:
+                continue
+            text = normalize_text(tail + "\n" + chunk)
+            end = score_complete_sentences(text, sentences, scores)
+            count(text[:end])
+            tail = text[end:]
+            if len(tail) > _MAX_SENTENCE_CHARS:
+                # Too long to be one sentence; score it in capped pieces and
+                # stop carrying it (re-normalizing a growing tail per chunk
+                # would be quadratic).
+                score_complete_sentences(tail, sentences, scores, final=True)
+                count(tail)
+                tail = ""
+    finally:
+        os.unlink(pdf_path)
+
+    if tail:
+        count(tail)
+        score_complete_sentences(tail, sentences, scores, final=True)
+
+    if not has_text:
         return {
             "grade_level": 0.0,
             "reading_time_minutes": 0.0,
@@ -171,31 +622,18 @@ async def analyze_pdf(file: UploadFile = File(...)):
             "top_risk_sentences": [],
         }
 
-    full_text = normalize_text(raw_text)
-
     # Readability metrics
-    grade_level = round(float(textstat.flesch_kincaid_grade(full_text)), 2)
-    reading_time_minutes = round(float(textstat.reading_time(full_text, ms_per_char=14.69) / 60), 2)
-
-    # Sentence scoring
-    sentences = split_sentences(full_text)
+    grade, minutes = fused_readability(*totals)
+    grade_level = round(grade, 2)
+    reading_time_minutes = round(minutes, 2)
 
-    all_scored: List[dict] = []
-    for s in sentences:
-        clean = s.strip()
-        if len(clean) < 20:
-            continue
-        risk = score_sentence(clean)
-        if risk > 0:
-            all_scored.append({"sentence": clean, "score": risk})
-
-    total_sentences = len(all_scored)
-    average_risk_score = round(
-        (sum(x["score"] for x in all_scored) / total_sentences) if total_sentences else 0.0,
-        2,
-    )
+    total_sentences = len(sentences)
+    scores_np = np.frombuffer(scores, dtype=np.uint8)
+    average_risk_score = round(float(scores_np.mean()) if total_sentences else 0.0, 2)
 
-    all_sorted = sorted(all_scored, key=lambda x: x["score"], reverse=True)
+    # Highest score first; the stable sort keeps document order among ties.
+    order = np.argsort(-scores_np.astype(np.int16), kind="stable")
+    all_sorted = [{"sentence": sentences[i], "score": scores[i]} for i in order.tolist()]
     top_risk = all_sorted[:10]
 
     return {
@@ -208,6 +646,95 @@ async def analyze_pdf(file: UploadFile = File(...)):
     }
 
 
+# Analyze results keyed by SHA-256 of the uploaded bytes, least recently
+# used first. Per process: only touched from the event loop, so no locking.
+# Bounded by approximate bytes rather than entry count: one huge PDF's
+# all_sentences can outweigh hundreds of small ones.
+_RESULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_result_cache: "OrderedDict[str, Tuple[dict, int]]" = OrderedDict()
+_result_cache_bytes = 0
+
+
+def _result_size(result: dict) -> int:
+    """Rough in-memory size of an analyze result: sentence text plus per-entry overhead."""
+    return 1024 + sum(len(s["sentence"]) + 256 for s in result["all_sentences"])
+
+
+def _cache_result(key: str, result: dict) -> None:
+    global _result_cache_bytes
+    size = _result_size(result)
+    if size > _RESULT_CACHE_MAX_BYTES:
+        return
+    _result_cache[key] = (result, size)
+    _result_cache_bytes += size
+    while _result_cache_bytes > _RESULT_CACHE_MAX_BYTES:
+        _, (_, evicted) = _result_cache.popitem(last=False)
+        _result_cache_bytes -= evicted
+
+
+def _new_process_pool() -> ProcessPoolExecutor:
+    # Spawn, never fork: forking copies whatever locks other request threads
+    # hold at that moment (and PDFium's state) into the children.
+    return ProcessPoolExecutor(
+        max_workers=max(1, (os.cpu_count() or 1) - 1),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+@app.on_event("startup")
+def start_pools():
+    global _analyze_pool, _process_pool
+    _analyze_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+    try:
+        _process_pool = _new_process_pool()
+    except (OSError, NotImplementedError):
+        _process_pool = None
+
+
+@app.on_event("shutdown")
+def stop_pools():
+    global _analyze_pool, _process_pool
+    for pool in (_analyze_pool, _process_pool):
+        if pool is not None:
+            pool.shutdown(wait=False)
+    _analyze_pool = None
+    _process_pool = None
+
+
+# ---------------------------
+# Routes
+# ---------------------------
+@app.get("/api")
+def root():
+    return {"status": "ReadRight backend running"}
+
+
+@app.get("/api/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.post("/api/analyze", response_model=AnalyzeResponse)
+async def analyze_pdf(file: UploadFile = File(...)):
+    data = await file.read()
+
+    # Users often re-upload the same PDF; identical bytes reuse the result.
+    key = hashlib.sha256(data).hexdigest()
+    cached = _result_cache.get(key)
+    if cached is not None:
+        _result_cache.move_to_end(key)
+        return cached[0]
+
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(_analyze_pool, _analyze_sync, data)
+    except PdfExtractionError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    _cache_result(key, result)
+    return result
+
+
 @app.post("/api/rewrite", response_model=RewriteResponse)
 async def rewrite_sentence(request: RewriteRequest):
     api_key = os.getenv("GROQ_API_KEY")